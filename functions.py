@@ -1,18 +1,24 @@
 import numpy as np  
 import random as ran
 import scipy as sc
+from market import _gbm_paths
+from monte_carlo import _mean_var
 
 class Market():
     """ Creates the market environment.
         Works for Models driven by a 1-dimensional Brownian Motion.
     """
-    def __init__(self,n,N,sigma,r,s0,T):
+    def __init__(self,n,N,sigma,r,s0,T,seed=None,dtype=np.float64):
         self.n = n
         self.N = N
         self.sigma = sigma
         self.r = r
         self.s0 = s0
         self.T = T
+        self.t = np.linspace(0,self.T,self.n)
+        self.dt = self.T/(self.n - 1) if self.n > 1 else 0.0
+        self.rng = np.random.default_rng(seed)
+        self.dtype = np.dtype(dtype)
         
     def brownian_motion(self):
         """Computes #N Sample paths of brownian motion
@@ -21,11 +27,11 @@ class Market():
             n (int): total number of grid points --> look time_grid()
             N (int): total Number of Samples drawn
         """
-        t = self.time_grid()
-        delta_t = t[1] - t[0]
-        dB = np.sqrt(delta_t) * np.random.normal(size=(self.N,self.n - 1))
-        B0 = np.zeros(shape=(self.N,1))
-        B = np.concatenate((B0,np.cumsum(dB,axis=1)),axis= 1)
+        dB = self.rng.standard_normal(size=(self.N,self.n - 1),dtype=self.dtype)
+        dB *= np.sqrt(self.dt)
+        B = np.empty(shape=(self.N,self.n),dtype=self.dtype)
+        B[:,0] = 0.0
+        np.cumsum(dB,axis=1,out=B[:,1:])
         return B
     
     def black_scholes(self):
@@ -33,15 +39,10 @@ class Market():
             S(t) = s_0* exp( (r - 0.5*sigma^2)*t + sigma*W_t)
 
         Returns:
-            S (Matrix / Array): Assetprice (row -> Samples, columns -> time points)
+            S (Matrix / Array): Assetprice (row -> Samples, columns -> time points), stored column-major
         """
-        t = self.time_grid()
-        BB = self.brownian_motion()
-        S = np.zeros(shape=(self.N,self.n))
-        for j in range(self.N):
-            for i in range(self.n):
-                S[j,i] = self.s0*np.exp((self.r - 0.5*(self.sigma**2))*t[i] + self.sigma*BB[j,i])
-        return S
+        S = np.empty(shape=(self.N,self.n),dtype=self.dtype,order='F')
+        return _gbm_paths(self.s0,self.r,self.sigma,self.T,self.rng.integers(2**32),S)
     
     def bs_phi(self,t,x):
         """performs transformation for time variable t and space Variable x of Geometric brownian Motion
@@ -58,12 +59,11 @@ class Market():
         Returns:
             Vector / array: time points
         """
-        time = np.linspace(0,self.T,self.n)
-        return time
+        return self.t
 
 
 class European_Options():
-    def __init__(self,n,N,K,Assetprice,t):
+    def __init__(self,n,N,K,Assetprice,t,r):
         """Initialize European Option Class. 
         Goal: Summarize all common European Options within one class for better calling / comparing.
 
@@ -73,12 +73,14 @@ class European_Options():
             K (float): Strike Price (K>0)
             Assetprice (Array): Matrix of Asset prices (axis = 1), Different samples in each row (axis = 0)
             t (Array): time grid
+            r (float): interest rate, used to discount the payoffs
         """
         self.K = K
         self.N = N
         self.n = n
-        self.S = Assetprice
+        self.S = np.asfortranarray(Assetprice)
         self.t = t
+        self.r = r
     
     def Arithmetic_asian_call(self,discounted):
         """Computes an European Arithmetic asian Call given the underlying asset S and strike price K
@@ -86,13 +88,9 @@ class European_Options():
         Returns:
             Vector / Array: Value of the option
         """
-        Value = np.zeros(shape = (self.N,))           
+        Value = np.maximum(np.einsum('ij->i', self.S, dtype=np.float64)*(1.0/self.n) - self.K, 0.0)
         if discounted == True:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] -self.t[0]))*np.max((1/self.n)* np.sum(self.S[j,:]) - self.K , 0) 
-        else:
-            for j in range(self.N):
-                Value[j] = np.max((1/self.n)* np.sum(self.S[j,:]) - self.K , 0) 
+            Value *= np.exp(-self.r*(self.t[-1] -self.t[0]))
         return Value
     
     def Call(self,discounted):
@@ -101,14 +99,9 @@ class European_Options():
         Returns:
             Array: Value for each sample path
         """
-        Value = np.zeros(shape = (self.N,))
-
+        Value = np.maximum(self.S[:,-1] - self.K, 0.0)
         if discounted == True:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] -self.t[0]))*np.max(0, self.S[j,-1] - self.K)
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0, self.S[j,-1] - self.K)
+            Value *= np.exp(-self.r*(self.t[-1] -self.t[0]))
         return Value
 
     
@@ -121,13 +114,9 @@ class European_Options():
         Returns:
             Array: Value for each sample path
         """
-        Value = np.zeros(shape = (self.N,))
+        Value = np.maximum(self.K - self.S[:,-1], 0.0)
         if discounted == True:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] -self.t[0]))*np.max(0,  self.K - self.S[j,-1])
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0,  self.K - self.S[j,-1])
+            Value *= np.exp(-self.r*(self.t[-1] -self.t[0]))
         return Value
     
     def geo_asian_call(self,discounted):
@@ -136,14 +125,9 @@ class European_Options():
         Returns:
             Array: Value of option
         """
-        Value = np.zeros(shape=(self.N,))
-
+        Value = np.maximum(np.exp(np.log(self.S).mean(axis=1, dtype=np.float64)) - self.K, 0.0)
         if discounted == True:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] - self.t[0]))*np.max(0, (np.prod(self.S)**(1/self.n)) - self.K) 
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0, (np.prod(self.S)**(1/self.n)) - self.K) 
+            Value *= np.exp(-self.r*(self.t[-1] - self.t[0]))
         return Value
     
 
@@ -184,7 +168,17 @@ class Monte_Carlo():
         self.r = r
         self.T = T
         self.K = K
+        self._z = sc.stats.norm.ppf(1 - 0.5*self.alpha)
         
+    def confidence_interval(self,p_mc,var_mc,size,discount=1.0):
+        """Confidence interval of level 1 - alpha around p_mc, given the sample variance var_mc of size samples
+            which were scaled by discount to obtain p_mc.
+
+        Returns:
+            ki (Array): Confidence Interval
+        """
+        half_width = self._z*discount*np.sqrt(var_mc/size)
+        return np.array([p_mc - half_width, p_mc + half_width])
         
     def Standard_MC(self):
         """Performs standard Monte Carlo Estimation given N samples of a random variable
@@ -194,12 +188,10 @@ class Monte_Carlo():
             Float: Variance of the estimator
             Array: Confidence Interval
         """
-        p_mc = np.exp(-self.r*self.T)*np.mean(self.ov)
-        var_mc = np.var(self.ov)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
+        mean, var_mc = _mean_var(self.ov)
+        discount = np.exp(-self.r*self.T)
+        p_mc = discount*mean
+        ki = self.confidence_interval(p_mc,var_mc,self.ov.size,discount)
         return p_mc, var_mc, ki
     
     def SMC(self):
@@ -210,12 +202,8 @@ class Monte_Carlo():
             var_mc (float): Estimated Monte Carlo Variance of p_mc
             ki (Array): Confidence Interval
         """
-        p_mc = np.mean(self.ov)
-        var_mc = np.var(self.ov)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
+        p_mc, var_mc = _mean_var(self.ov)
+        ki = self.confidence_interval(p_mc,var_mc,self.ov.size)
         return p_mc, var_mc, ki
     
     def Anti_thetic_MC(self,env):
@@ -225,17 +213,13 @@ class Monte_Carlo():
         Returns:
             _type_: _description_
         """
-        samples = np.zeros(shape=(self.N,))
         const = 0.5*np.exp(-self.r*self.T)
-        for j in range(self.N):
-            normal_z = np.random.normal(size=(1,))
-            samples[j] = const*(np.max(env.bs_phi(self.T,np.sqrt(self.T)*normal_z) - self.K, 0)+ np.max(env.bs_phi(self.T,-1*np.sqrt(self.T)*normal_z) - self.K, 0))
-        p_mc = np.mean(samples)
-        var_mc = np.var(samples)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
+        normal_z = env.rng.standard_normal(size=(self.N,))
+        s_plus = env.bs_phi(self.T,np.sqrt(self.T)*normal_z)
+        s_minus = env.bs_phi(self.T,-1*np.sqrt(self.T)*normal_z)
+        samples = const*(np.maximum(s_plus - self.K, 0.0) + np.maximum(s_minus - self.K, 0.0))
+        p_mc, var_mc = _mean_var(samples)
+        ki = self.confidence_interval(p_mc,var_mc,samples.size)
         return p_mc, var_mc, ki   
         
 
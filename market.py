@@ -1,4 +1,42 @@
+import math
+
 import numpy as np
+from numba import njit, prange
+
+
+_PATH_BLOCK = 1024  # paths per independently seeded block in the numba kernels
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _gbm_paths(s0, r, sigma, time_horizon, seed, out):
+    """Fills out (N x n) with Black Scholes paths on an equidistant time grid.
+        Brownian increments are accumulated per path and exponentiated in the same pass,
+        so the Brownian motion matrix is never materialized.
+        Paths are simulated in blocks of _PATH_BLOCK, each seeding numba's generator with seed + block,
+        so the result does not depend on the number of threads. Within a block time is the outer loop,
+        so every step writes a contiguous piece of a column of column-major (order='F') output.
+    """
+    paths, n = out.shape
+    dt = time_horizon / (n - 1) if n > 1 else 0.0
+    sdt = math.sqrt(dt)
+    mu = r - 0.5 * sigma * sigma
+    num_blocks = (paths + _PATH_BLOCK - 1) // _PATH_BLOCK
+    for block in prange(num_blocks):
+        np.random.seed((seed + block) % 4294967296)  # seeds the generator of the thread running this block
+        start = block * _PATH_BLOCK
+        m = min(_PATH_BLOCK, paths - start)
+        b = np.zeros(m)  # current value of the Brownian motion per path, kept in float64 whatever the dtype of out
+        z = np.empty(m)
+        for j in range(m):
+            out[start + j, 0] = s0
+        for i in range(1, n):
+            drift = mu * i * dt
+            for j in range(m):
+                z[j] = np.random.standard_normal()
+            for j in range(m):  # separate from the draws so that this loop vectorizes
+                b[j] += sdt * z[j]
+                out[start + j, i] = s0 * math.exp(drift + sigma * b[j])
+    return out
 
 
 class Market:
@@ -6,7 +44,7 @@ class Market:
         Works for Models driven by a 1-dimensional Brownian Motion.
     """
 
-    def __init__(self, n, paths, r, s0, time_horizon):
+    def __init__(self, n, paths, r, s0, time_horizon, seed=None, dtype=np.float64):
         try:
             assert n > 0
             self.n = int(n)
@@ -19,6 +57,10 @@ class Market:
             self.T = float(time_horizon)
         except ValueError:
             print('Wrong market parameters')
+        self.t = np.linspace(0, self.T, self.n)  # time grid, computed once
+        self.dt = self.T / (self.n - 1) if self.n > 1 else 0.0
+        self.rng = np.random.default_rng(seed)  # PCG64 generator, also seeds the numba path kernel
+        self.dtype = np.dtype(dtype)  # storage type of simulated paths, np.float32 halves their memory traffic
 
     def time_grid(self):
         """Creates a time grid given Time Horizon T and total number of points n.
@@ -26,8 +68,7 @@ class Market:
         Returns:
             Vector / array: time points
         """
-        time = np.linspace(0, self.T, self.n)
-        return time
+        return self.t
 
     def brownian_motion(self):
         """
@@ -36,25 +77,25 @@ class Market:
         Returns:
             bb (Matrix): Brownian motion array
         """
-        t = self.time_grid()  # time grid
-        delta_t = t[1] - t[0]  # delta t
-        db = np.sqrt(delta_t) * np.random.normal(size=(self.N, self.n - 1))  # brownian increments
-        b0 = np.zeros(shape=(self.N, 1))  # starting vector
-        bb = np.concatenate((b0, np.cumsum(db, axis=1)), axis=1)  # brownian motion
+        db = self.rng.standard_normal(size=(self.N, self.n - 1), dtype=self.dtype)  # brownian increments
+        db *= np.sqrt(self.dt)
+        bb = np.empty(shape=(self.N, self.n), dtype=self.dtype)  # brownian motion
+        bb[:, 0] = 0.0  # starting vector
+        np.cumsum(db, axis=1, out=bb[:, 1:])
         return bb
 
     def heston_paths(self, kappa, theta, v_0, rho, xi, return_vol=False):
         dt = self.T / self.n
         size = (self.n, self.N)
-        prices = np.zeros(size)
-        sigs = np.zeros(size)
+        prices = np.zeros(size, dtype=self.dtype)
+        sigs = np.zeros(size, dtype=self.dtype)
         s_t = self.s0
         v_t = v_0
         for t in range(self.n):
-            bb = np.random.multivariate_normal(np.array([0, 0]),
-                                               cov=np.array([[1, rho],
-                                                             [rho, 1]]),
-                                               size=self.N) * np.sqrt(dt)
+            bb = self.rng.multivariate_normal(np.array([0, 0]),
+                                              cov=np.array([[1, rho],
+                                                            [rho, 1]]),
+                                              size=self.N) * np.sqrt(dt)
 
             s_t = s_t * (np.exp((self.r - 0.5 * v_t) * dt + np.sqrt(v_t) * bb[:, 0]))
             v_t = np.abs(v_t + kappa * (theta - v_t) * dt + xi * np.sqrt(v_t) * bb[:, 1])
@@ -73,14 +114,9 @@ class Market:
         ----------
         sigma Volatility in Black Scholes SDE
 
-        Returns Black Scholes price Array
+        Returns Black Scholes price Array (column-major, samples row-wise and time points column-wise)
         -------
 
         """
-        t = self.time_grid()
-        bb = self.brownian_motion()
-        s = np.zeros(shape=(self.N, self.n))
-        for j in range(self.N):
-            for i in range(self.n):
-                s[j, i] = self.s0 * np.exp((self.r - 0.5 * (sigma ** 2)) * t[i] + sigma * bb[j, i])
-        return s
+        s = np.empty(shape=(self.N, self.n), dtype=self.dtype, order='F')  # column-major: time slices s[:, i] are contiguous
+        return _gbm_paths(self.s0, self.r, float(sigma), self.T, self.rng.integers(2 ** 32), s)
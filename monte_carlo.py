@@ -1,5 +1,62 @@
+import math
+
 import numpy as np
 import scipy as sc
+from numba import njit, prange
+
+from market import Market, _PATH_BLOCK
+from options import European
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def mc_call(N, n, s0, r, sigma, T, K, seed):
+    """Standard Monte Carlo estimation of an European call under Black Scholes in one pass.
+        Every path is simulated on the n point time grid and reduced to its payoff right away,
+        so no asset price matrix (or payoff vector) is ever allocated.
+        Blocks of paths are seeded as in market._gbm_paths and their sums added serially in block order,
+        so a seed gives the same result on any number of threads.
+        Same convention as Monte_Carlo.Standard_MC: the mean is discounted with exp(-r*T), the variance is not.
+
+    Returns:
+        p_mc (float): Estimated Monte Carlo Value
+        var_mc (float): Estimated variance of the payoff
+    """
+    dt = T / (n - 1) if n > 1 else 0.0
+    sdt = math.sqrt(dt)
+    mu = r - 0.5 * sigma * sigma
+    num_blocks = (N + _PATH_BLOCK - 1) // _PATH_BLOCK
+    block_sum = np.zeros(num_blocks)
+    block_sq = np.zeros(num_blocks)
+    for block in prange(num_blocks):
+        np.random.seed((seed + block) % 4294967296)
+        s_sum = 0.0
+        s_sq = 0.0
+        for j in range(block * _PATH_BLOCK, min((block + 1) * _PATH_BLOCK, N)):
+            b = 0.0
+            for i in range(1, n):
+                b += sdt * np.random.standard_normal()
+            payoff = max(s0 * math.exp(mu * T + sigma * b) - K, 0.0)
+            s_sum += payoff
+            s_sq += payoff * payoff
+        block_sum[block] = s_sum
+        block_sq[block] = s_sq
+    total = 0.0
+    total_sq = 0.0
+    for block in range(num_blocks):  # serial on purpose, block_sum.sum() would become a thread-dependent parallel reduction
+        total += block_sum[block]
+        total_sq += block_sq[block]
+    mean = total / N
+    return math.exp(-r * T) * mean, max(total_sq / N - mean * mean, 0.0)  # clamp rounding below zero
+
+
+def _mean_var(x):
+    """Mean and (population) variance of the samples x in two passes, accumulated in float64."""
+    mean = np.sum(x, dtype=np.float64)/x.size
+    d = x - mean  # centred, E[X^2] - E[X]^2 cancels catastrophically for (nearly) constant samples
+    var = np.einsum('i,i->', d, d, dtype=np.float64)/x.size
+    return mean, var
+
+
 class Monte_Carlo():
     """ Class to perform different Monte Carlo Estimation for financial options
         TODO: Dependencies within init are inconsistent --> Move all non essential (global) variables for each estimator to its respective function
@@ -11,7 +68,17 @@ class Monte_Carlo():
         self.r = r
         self.T = T
         self.K = K
+        self._z = sc.stats.norm.ppf(1 - 0.5*self.alpha)  # two-sided normal percentile for the confidence intervals
         
+    def confidence_interval(self, p_mc, var_mc, size, discount=1.0):
+        """Confidence interval of level 1 - alpha around p_mc, given the sample variance var_mc of size samples
+            which were scaled by discount to obtain p_mc.
+
+        Returns:
+            ki (Array): Confidence Interval
+        """
+        half_width = self._z*discount*np.sqrt(var_mc/size)
+        return np.array([p_mc - half_width, p_mc + half_width])
         
     def Standard_MC(self):
         """Performs standard Monte Carlo Estimation given N samples of a random variable
@@ -21,12 +88,10 @@ class Monte_Carlo():
             Float: Variance of the estimator
             Array: Confidence Interval
         """
-        p_mc = np.exp(-self.r*self.T)*np.mean(self.ov)
-        var_mc = np.var(self.ov)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
+        mean, var_mc = _mean_var(self.ov)
+        discount = np.exp(-self.r*self.T)
+        p_mc = discount*mean
+        ki = self.confidence_interval(p_mc, var_mc, self.ov.size, discount)
         return p_mc, var_mc, ki
     
     def SMC(self):
@@ -37,31 +102,59 @@ class Monte_Carlo():
             var_mc (float): Estimated Monte Carlo Variance of p_mc
             ki (Array): Confidence Interval
         """
-        p_mc = np.mean(self.ov)
-        var_mc = np.var(self.ov)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
+        p_mc, var_mc = _mean_var(self.ov)
+        ki = self.confidence_interval(p_mc, var_mc, self.ov.size)
         return p_mc, var_mc, ki
     
-    def Anti_thetic_MC(self, env):
+    def Anti_thetic_MC(self, env, sigma):
         """Performs antithetic estimator for geometric brownian motion
         Uses: Environment --> Asset from Market
         Has to be called with r = T and 
+        Args:
+            env (Market): market environment providing s0 and the random generator
+            sigma (float): Volatility in Black Scholes SDE
         Returns:
             _type_: _description_
         """
-        samples = np.zeros(shape=(self.N,))
-        const = 0.5*np.exp(-self.r*self.T)
-        for j in range(self.N):
-            normal_z = np.random.normal(size=(1,))
-            samples[j] = const*(np.max(env.bs_phi(self.T,np.sqrt(self.T)*normal_z) - self.K, 0)+ np.max(env.bs_phi(self.T,-1*np.sqrt(self.T)*normal_z) - self.K, 0))
-        p_mc = np.mean(samples)
-        var_mc = np.var(samples)
-        percentile = sc.stats.norm.ppf(1 - 0.5*self.alpha)
-        upper = p_mc + percentile*np.sqrt(var_mc)/self.N
-        lower = p_mc - percentile*np.sqrt(var_mc)/self.N
-        ki = np.array([lower, upper])
-        return p_mc, var_mc, ki   
-        
\ No newline at end of file
+        normal_z = env.rng.standard_normal(size=(self.N,))
+        drift = (self.r - 0.5*sigma**2)*self.T
+        diffusion = sigma*np.sqrt(self.T)*normal_z
+        s_plus = env.s0*np.exp(drift + diffusion)
+        s_minus = env.s0*np.exp(drift - diffusion)
+        samples = 0.5*np.exp(-self.r*self.T)*(np.maximum(s_plus - self.K, 0.0) + np.maximum(s_minus - self.K, 0.0))
+        p_mc, var_mc = _mean_var(samples)
+        ki = self.confidence_interval(p_mc, var_mc, samples.size)
+        return p_mc, var_mc, ki
+
+
+def run_mc(params):
+    """Runs one Monte Carlo estimation of a European call for a single parameter set.
+        Module-level so it can be shipped to worker processes (e.g. joblib.Parallel).
+
+    Args:
+        params (dict): n, paths, r, s0, T, sigma, K, alpha and optionally seed
+            and estimator ('standard' (default), 'antithetic' or 'fused' (see mc_call)),
+            dtype (path storage type, np.float64 by default)
+
+    Returns:
+        p_mc (float): Estimated Monte Carlo Value
+        var_mc (float): Estimated Monte Carlo Variance
+        ki (Array): Confidence Interval
+    """
+    estimator = params.get('estimator', 'standard')
+    if estimator not in ('standard', 'antithetic', 'fused'):
+        raise ValueError("No valid estimator chosen: '" + str(estimator) + "' (use 'standard', 'antithetic' or 'fused')")
+    market = Market(n=params['n'], paths=params['paths'], r=params['r'], s0=params['s0'],
+                    time_horizon=params['T'], seed=params.get('seed'), dtype=params.get('dtype', np.float64))
+    mc = Monte_Carlo(N=market.N, rv=None, alpha=params['alpha'], r=market.r, T=market.T, K=params['K'])
+    if estimator == 'standard':
+        s = market.black_scholes(sigma=params['sigma'])
+        option = European(market.n, market.N, params['K'], s, market.time_grid(), market.r)
+        mc.ov = option.Call(discounted=False)
+        return mc.Standard_MC()
+    elif estimator == 'antithetic':
+        return mc.Anti_thetic_MC(market, params['sigma'])
+    else:
+        p_mc, var_mc = mc_call(market.N, market.n, market.s0, market.r, params['sigma'], market.T, params['K'],
+                               market.rng.integers(2 ** 32))
+        return p_mc, var_mc, mc.confidence_interval(p_mc, var_mc, market.N, np.exp(-market.r*market.T))
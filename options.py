@@ -10,13 +10,13 @@ class European:
             n (Int): Number of time grid points
             N (Int): Number of samples
             K (float): Strike Price (K>0)
-            Assetprice (Array): Matrix of Asset prices (axis = 1), Different samples in each row (axis = 0)
+            Assetprice (Array): Matrix of Asset prices (axis = 1), Different samples in each row (axis = 0), stored column-major
             t (Array): time grid
         """
         self.K = K
         self.N = N
         self.n = n
-        self.S = Assetprice
+        self.S = np.asfortranarray(Assetprice)
         self.t = t
         self.r = r
     
@@ -26,13 +26,9 @@ class European:
         Returns:
             Vector / Array: Value of the option
         """
-        Value = np.zeros(shape=(self.N,))
+        Value = np.maximum(np.einsum('ij->i', self.S, dtype=np.float64)*(1.0/self.n) - self.K, 0.0)
         if discounted:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] -self.t[0]))*np.max((1/self.n)* np.sum(self.S[j,:]) - self.K , 0) 
-        else:
-            for j in range(self.N):
-                Value[j] = np.max((1/self.n)* np.sum(self.S[j,:]) - self.K , 0) 
+            Value *= np.exp(-self.r*(self.t[-1] - self.t[0]))
         return Value
     
     def Call(self, discounted):
@@ -41,14 +37,9 @@ class European:
         Returns:
             Array: Value for each sample path
         """
-        Value = np.zeros(shape=(self.N,))
-
+        Value = np.maximum(self.S[:, -1] - self.K, 0.0)
         if discounted:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] - self.t[0]))*np.max(0, self.S[j, -1] - self.K)
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0, self.S[j, -1] - self.K)
+            Value *= np.exp(-self.r*(self.t[-1] - self.t[0]))
         return Value
 
     
@@ -61,27 +52,18 @@ class European:
         Returns:
             Array: Value for each sample path
         """
-        Value = np.zeros(shape=(self.N,))
+        Value = np.maximum(self.K - self.S[:, -1], 0.0)
         if discounted:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] - self.t[0]))*np.max(0,  self.K - self.S[j, -1])
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0,  self.K - self.S[j, -1])
+            Value *= np.exp(-self.r*(self.t[-1] - self.t[0]))
         return Value
     
     def geo_asian_call(self, discounted):
-        """Computes an european geometric asian call given the underlying asset S and strike price K
+        """Computes an european geometric asian call (geometric mean taken in log space) given the underlying asset S and strike price K
 
         Returns:
             Array: Value of option
         """
-        Value = np.zeros(shape=(self.N,))
-
+        Value = np.maximum(np.exp(np.log(self.S).mean(axis=1, dtype=np.float64)) - self.K, 0.0)
         if discounted:
-            for j in range(self.N):
-                Value[j] = np.exp(-self.r*(self.t[-1] - self.t[0]))*np.max(0, (np.prod(self.S)**(1/self.n)) - self.K) 
-        else:
-            for j in range(self.N):
-                Value[j] = np.max(0, (np.prod(self.S)**(1/self.n)) - self.K) 
+            Value *= np.exp(-self.r*(self.t[-1] - self.t[0]))
         return Value
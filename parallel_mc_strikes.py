@@ -0,0 +1,30 @@
+import numpy as np
+from joblib import Parallel, delayed
+
+from monte_carlo import run_mc
+from bs_theoretical_values import bs_call
+
+# Parameters
+T = 1
+N = 100000
+n = 50
+r = 0.06
+sigma = 0.2
+s0 = 36
+alpha = 0.05
+seed = 1234
+
+K = np.linspace(20, 50, 31)
+# independent random streams for every strike
+seeds = np.random.SeedSequence(seed).spawn(len(K))
+param_list = [dict(n=n, paths=N, r=r, s0=s0, T=T, sigma=sigma, K=K[i], alpha=alpha, seed=seeds[i])
+              for i in range(len(K))]
+
+if __name__ == '__main__':
+    # each strike is an independent estimation -> one process per job
+    results = Parallel(n_jobs=-1, backend='loky')(delayed(run_mc)(p) for p in param_list)
+    for i in range(len(K)):
+        p_mc, var_mc, ki = results[i]
+        theoretical_value = bs_call(s0=s0, strikeprice=K[i], timehorizon=T, r=r, sigma=sigma)
+        print('K = ' + str(K[i]) + ': MC value ' + str(p_mc) + ', confidence interval ' + str(ki)
+              + ', theoretical value ' + str(theoretical_value))
@@ -0,0 +1,37 @@
+import os
+os.environ.setdefault('NUMBA_NUM_THREADS', '4')  # several workers even on small machines, set before numba is imported
+os.environ.setdefault('NUMBA_THREADING_LAYER', 'workqueue')
+
+import numpy as np
+import numba
+
+from market import Market
+from monte_carlo import mc_call
+
+T = 1
+N = [5000, 20000]  # 5 and 20 blocks of paths
+n = 50
+r = 0.06
+sigma = 0.2
+s0 = 36
+K = 40
+seed = 7
+
+
+def run_kernels(paths):
+    S = Market(n=n, paths=paths, r=r, s0=s0, time_horizon=T, seed=seed).black_scholes(sigma=sigma)
+    fused = mc_call(paths, n, s0, r, sigma, T, K, seed)
+    return S, fused
+
+
+for paths in N:
+    numba.set_num_threads(1)
+    S_single, fused_single = run_kernels(paths)
+    numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)
+    S_multi, fused_multi = run_kernels(paths)
+
+    print('N = ' + str(paths) + ', numba threads: 1 vs ' + str(numba.get_num_threads()))
+    print('Same seed, same Black Scholes paths: ', np.array_equal(S_single, S_multi))
+    print('Same seed, same fused estimate: ', fused_single == fused_multi, fused_single, fused_multi)
+    assert np.array_equal(S_single, S_multi)
+    assert fused_single[0] == fused_multi[0] and fused_single[1] == fused_multi[1]